@@ -2,8 +2,88 @@ from pkg.plugin.context import register, handler, llm_func, BasePlugin, APIHost,
 from pkg.plugin.events import *  # 导入事件类
 from pkg.platform.types import *  # 导入所有消息类型
 import re
-import json
 import os
+import functools
+
+try:
+    # 可选依赖：orjson 以原生代码解析 JSON，未安装时回退到标准库 json
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+
+# 匹配Markdown图片格式：![描述](URL)，模块加载时编译一次
+_IMG_RE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+# 判定绝对URL（http/https/data URI），忽略大小写，避免对整个URL做 lower()
+_ABS_URL_RE = re.compile(r'(?i)^(?:https?://|data:)')
+
+
+def _normalize_image_url(url: str, base: str) -> str:
+    """将图片URL标准化，base 为已去除末尾 "/" 的 base_url。"""
+    if not url or _ABS_URL_RE.match(url):
+        return url
+    if url[0] == "/" and base:
+        # 补齐前缀
+        return base + url
+    return url
+
+
+@functools.lru_cache(maxsize=128)
+def _parse(text: str, base: str):
+    """解析Markdown图片文本的纯函数实现，返回不可变结果以便缓存。
+
+    Returns:
+        tuple: (segments, has_relative)，segments 为 ("t"/"i", 内容) 二元组构成的元组。
+    """
+    result = []
+    has_relative = False
+    last_end = 0
+    # 热循环中使用的全局对象/方法绑定为局部变量，减少查找开销
+    _append = result.append
+    _is_abs = _ABS_URL_RE.match
+    _norm = _normalize_image_url
+
+    for match in _IMG_RE.finditer(text):
+        start, end = match.span()
+        # alt 文本不参与消息构建，不再保留
+        _alt, raw_url = match.groups()
+
+        # 在同一次扫描中判定相对URL，避免重复匹配
+        if not _is_abs(raw_url.strip()):
+            has_relative = True
+        image = ("i", _norm(raw_url, base))
+
+        # 图片前有文本时，文本与图片一次性追加
+        text_before = text[last_end:start] if start > last_end else ""
+        if text_before and not text_before.isspace():
+            result += (("t", text_before), image)
+        else:
+            _append(image)
+
+        last_end = end
+
+    # 添加最后剩余的文本
+    if last_end < len(text):
+        remaining_text = text[last_end:]
+        if remaining_text and not remaining_text.isspace():
+            result.append(("t", remaining_text))
+
+    return tuple(result), has_relative
+
+
+def _build_components(segments) -> list:
+    """由 _parse 的结果构建 Plain/Image 消息链。
+
+    缓存中仅保存不可变元组，消息组件每次重新构建（平台适配器可能会修改它们）；
+    图片直接使用URL，让平台适配器处理图片下载。
+    """
+    # 片段数量已知，预先分配列表，构建过程中无需扩容
+    _Plain = Plain
+    _Image = Image
+    message_components = [None] * len(segments)
+    for i, (kind, payload) in enumerate(segments):
+        message_components[i] = _Plain(payload) if kind == "t" else _Image(url=payload)
+    return message_components
 
 
 # 注册插件
@@ -27,6 +107,12 @@ class MdToImage(BasePlugin):
         super().__init__(host)
         # 从插件目录下的 config.json 读取 base_url
         self.base_url: str = self._load_base_url_from_config()
+        # base_url 读取时已去除末尾 "/"，缓存供 normalize_image_url 直接拼接
+        self._base_url_stripped: str = self.base_url
+        # base_url 仅在构造时读取一次，据此在处理器入口选择处理路径
+        self._has_base: bool = bool(self.base_url)
+        # 预先解析日志对象，异常路径上无需重复 hasattr 判断
+        self._log = getattr(getattr(self, 'ap', None), 'logger', None)
 
     def _load_base_url_from_config(self) -> str:
         """从同目录的 config.json 读取 base_url 配置。
@@ -41,10 +127,9 @@ class MdToImage(BasePlugin):
         current_dir = os.path.dirname(__file__)
         config_path = os.path.join(current_dir, 'config.json')
         try:
-            if not os.path.exists(config_path):
-                return ""
+            # 文件不存在时 open 抛出 FileNotFoundError，由下方统一处理
             with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = _json.loads(f.read())
                 base_url = (data.get('base_url') or '').strip()
                 return base_url.rstrip('/') if base_url else ""
         except Exception:
@@ -55,7 +140,8 @@ class MdToImage(BasePlugin):
         """插件的异步初始化方法。
         用于在插件加载后进行异步资源初始化，例如网络连接、缓存预热等。
         """
-        pass
+        # 宿主可能在构造之后才注入 ap，此处重新解析一次日志对象
+        self._log = getattr(getattr(self, 'ap', None), 'logger', None)
 
     def normalize_image_url(self, url: str) -> str:
         """将图片URL标准化。
@@ -71,59 +157,43 @@ class MdToImage(BasePlugin):
         Returns:
             str: 处理后的完整URL。
         """
-        try:
-            if not url:
-                return url
-            lower = url.lower()
-            if lower.startswith("http://") or lower.startswith("https://") or lower.startswith("data:"):
-                return url
-            if url.startswith("/"):
-                # 补齐前缀
-                return self.base_url.rstrip("/") + url
-            return url
-        except Exception:
-            # 失败时不阻断流程，直接返回原URL
-            return url
+        return _normalize_image_url(url, self._base_url_stripped)
 
     def parse_markdown_content(self, text: str):
         """解析包含Markdown图片的文本，返回文本片段和图片URL的有序列表。
 
         支持的图片格式：![]()，例如：这是文本![描述](https://example.com/1.png)继续文本。
         会将文本拆分为若干段：文本段使用 Plain，图片段直接使用 Image(url=...)，并保持原顺序组合。
+        解析结果按 (text, base_url) 缓存，重复的回复不会再次扫描。
 
         Args:
             text (str): 包含Markdown格式图片的文本。
 
         Returns:
-            list: 有序列表，元素为{"type": "text", "content": str}或{"type": "image", "alt": str, "url": str}。
+            tuple: (message_components, has_relative)
+                - message_components: 有序列表，元素为 Plain 或 Image，可直接作为回复消息链；
+                - has_relative: 是否存在相对URL（不以 http(s):// 或 data: 开头）。
         """
-        # 匹配Markdown图片格式：![描述](URL)
-        pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-
-        result = []
-        last_end = 0
-
-        for match in re.finditer(pattern, text):
-            # 添加图片前的文本
-            if match.start() > last_end:
-                text_before = text[last_end:match.start()]
-                if text_before.strip():
-                    result.append({"type": "text", "content": text_before})
+        segments, has_relative = _parse(text, self._base_url_stripped)
+        return _build_components(segments), has_relative
 
-            # 添加图片信息
-            alt_text = match.group(1)
-            image_url = self.normalize_image_url(match.group(2))
-            result.append({"type": "image", "alt": alt_text, "url": image_url})
+    def _handle_absolute_only(self, ctx: EventContext, resp_text: str):
+        """未配置 base_url 时的处理路径。
 
-            last_end = match.end()
+        此时相对URL无法补齐：只要存在相对URL即保持原消息，且不再构建任何消息组件；
+        全部为绝对URL时按原顺序构建消息链。
 
-        # 添加最后剩余的文本
-        if last_end < len(text):
-            remaining_text = text[last_end:]
-            if remaining_text.strip():
-                result.append({"type": "text", "content": remaining_text})
-
-        return result
+        Args:
+            ctx (EventContext): 事件上下文。
+            resp_text (str): AI响应文本。
+        """
+        segments, has_relative = _parse(resp_text, "")
+        if has_relative:
+            # 未配置 base_url，保持原消息
+            return
+        reply = _build_components(segments)
+        if reply:
+            ctx.event.reply = reply
 
     @handler(NormalMessageResponded)
     async def normal_message_responded(self, ctx: EventContext):
@@ -141,34 +211,17 @@ class MdToImage(BasePlugin):
             resp_text = ctx.event.response_text or ""
 
             # 仅处理 Markdown 图片
-            img_pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-            if re.search(img_pattern, resp_text):
-                # 如果存在相对URL且未配置 base_url，则不改写原消息
-                # 判定相对URL：不以 http(s):// 或 data: 开头
-                urls = [m.group(2).strip() for m in re.finditer(img_pattern, resp_text)]
-                has_relative = any(not (u.lower().startswith('http://') or u.lower().startswith('https://') or u.lower().startswith('data:')) for u in urls)
-                if has_relative and not self.base_url:
-                    # 未配置 base_url，保持原消息
-                    return
-
-                parsed_content = self.parse_markdown_content(resp_text)
-                message_components = []
-
-                for item in parsed_content:
-                    if item["type"] == "text":
-                        message_components.append(Plain(item["content"]))
-                    elif item["type"] == "image":
-                        # 直接使用URL，让平台适配器处理图片下载
-                        message_components.append(Image(url=item["url"]))
-
-                if message_components:
-                    ctx.event.reply = message_components
+            if '![' in resp_text and _IMG_RE.search(resp_text):
+                if not self._has_base:
+                    # 未配置 base_url：存在相对URL时不改写原消息
+                    return self._handle_absolute_only(ctx, resp_text)
+
+                reply, _has_relative = self.parse_markdown_content(resp_text)
+                if reply:
+                    ctx.event.reply = reply
                     return
 
         except Exception as e:
             # 不中断主流程，记录日志以便排查
-            if hasattr(self, 'ap') and hasattr(self.ap, 'logger'):
-                self.ap.logger.error(f"ToImagePlugin.normal_message_responded 处理异常: {e}")
-
-    def __del__(self):
-        """插件析构函数，释放资源（如果有）。"""
+            if self._log is not None:
+                self._log.error(f"ToImagePlugin.normal_message_responded 处理异常: {e}")